@@ -18,31 +18,51 @@ from ..SnakeEnv import SnakeGame
 import tensorflow as tf
 from tensorflow.keras.layers import Dense, Input
 from tensorflow.keras.models import Sequential
-from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import pprint
 
 # The methods for producing proper states
 # have already been done for us. For starters,
 # we just need to need to play out the game
 
+# By default, TF grabs all of the GPU's memory up front, so a second
+# training run started next to this one would fail to allocate anything.
+# Only take what's actually needed, so several runs can share one GPU.
+# This can only be set before TF starts using the GPUs, so if something
+# else got to them first, we're stuck with what it picked...
+for gpu in tf.config.list_physical_devices('GPU'):
+    try:
+        tf.config.experimental.set_memory_growth(gpu, True)
+    except RuntimeError:
+        pass
+
+# There are only 2^11 possible states, so every one of them is decoded
+# ahead of time. Row i holds the bits of i, most significant first,
+# which is the same order as the bits of the encoded state...
+STATE_BITS = ((np.arange(2 ** 11)[:, np.newaxis] >> np.arange(10, -1, -1)) & 1).astype(np.float32)
+
 
 class BinaryDQN:
-    def __init__(self, episodes=2500, memoryLength=250, replaceFrequency=100, batchSize=32, boardSize=10):
+    def __init__(self, episodes=2500, memoryLength=250, replaceFrequency=100, batchSize=32, boardSize=10,
+                 numEnvs=8, seed=None):
         self.episodes = episodes  # How many times to gather experiential memory?
         self.episodeCount = 1
         self.memoryLength = memoryLength  # The number of actions to store in the memory buffer
         self.replaceFrequency = replaceFrequency  # After how many episodes do we replace the prediction with target?
+        self.numEnvs = numEnvs  # How many games are played side by side when gathering memory?
 
-        self.agent = SnakeAgent()
-        self.env = SnakeGame(boardSize=boardSize, snakeAgent=self.agent)
+        # Each environment gets its own agent, so that all of them can be
+        # stepped together and their states passed through the network at once...
+        self.agents = [SnakeAgent(boardSize=boardSize) for _ in range(self.numEnvs)]
+        self.envs = [SnakeGame(boardSize=boardSize, snakeAgent=agent) for agent in self.agents]
+        self.actionList = SnakeAgent.ACTIONS
+        self.numActions = len(self.actionList)
 
         self.targetModel = self.createMethod()  # The model which is trained
         self.predictionModel = self.createMethod()  # The model which only gives us Q-value predictions...
-
-        print(f'Model Summary\n{self.targetModel.summary()}')
-        print('Compiling models...')
-        self.targetModel.compile(optimizer='adam', loss='mse')
-        self.targetModel.compile(optimizer='adam', loss='mse')
+        self.predictionModel.set_weights(self.targetModel.get_weights())
+        self.cachePredictionWeights()
+        self.lastReplaceEpisode = self.episodeCount
 
         # Epsilon, epsilon decay rate, and minimum epsilon
         self.epsilon = 1
@@ -51,14 +71,39 @@ class BinaryDQN:
         self.gamma = 0.99
         self.lr = 1e-3
 
-        # The memory is a deque data structure, where if we add something that
-        # exceeds the max length, the oldest element simply gets returned...
-        self.memory = deque(maxlen=self.memoryLength)
+        print(f'Model Summary\n{self.targetModel.summary()}')
+        # Only the target model gets trained, and that's done by fitBatch()
+        # below, so there's nothing to compile. It just needs an optimizer...
+        self.optimizer = tf.keras.optimizers.Adam(learning_rate=self.lr)
+
+        # The memory is a ring buffer, with one preallocated array per field.
+        # memoryIndex is where the next tuple gets written, and once the buffer
+        # is full, the oldest element simply gets overwritten...
+        # The states only ever go into the TF models, so they live on the
+        # device, and a sampled batch never has to be copied over...
+        self.memoryStates = tf.Variable(tf.zeros((self.memoryLength, 11), dtype=tf.float32), trainable=False)
+        self.memoryActions = np.zeros(self.memoryLength, dtype=np.int32)
+        self.memoryRewards = np.zeros(self.memoryLength, dtype=np.int32)
+        self.memoryNextStates = np.zeros((self.memoryLength, 11), dtype=np.float32)
+        self.memoryGameOvers = np.zeros(self.memoryLength, dtype=bool)
+        self.memoryIndex = 0
+        self.memorySize = 0
+        # Used for sampling from the memory. Its choice() without replacement only
+        # draws batchSize numbers, where np.random.choice() shuffles the whole memory.
+        # Without a seed of its own, it's seeded off of numpy's global random state,
+        # so np.random.seed() still decides the whole run, like everywhere else...
+        if seed is None:
+            seed = np.random.randint(0, 2 ** 31 - 1)
+        self.sampler = np.random.default_rng(seed)
         self.batchSize = batchSize
+        # Training happens on this thread, so that the environments can keep playing meanwhile...
+        self.trainingThread = ThreadPoolExecutor(max_workers=1)
 
     def createMethod(self):
         model = Sequential()
-        model.add(Input(shape=(11,), name='SnakeInput', dtype=tf.int32))
+        # The states are stored as float32 already, so the input takes
+        # them as is, without a cast in front of the first layer...
+        model.add(Input(shape=(11,), name='SnakeInput', dtype=tf.float32))
         model.add(Dense(8, activation='relu', name='HiddenLayer1'))
         model.add(Dense(8, activation='relu', name='HiddenLayer2'))
         model.add(Dense(8, activation='relu', name='HiddenLayer3'))
@@ -67,103 +112,185 @@ class BinaryDQN:
         model.add(Dense(3, name='QValueOutput'))
         return model
 
-    def preprocessState(self, state):
+    def cachePredictionWeights(self):
         """
-        The state returned from our snake is a 11-digit bit
-        string. We need to convert it to an actual integer
-        array of 0s and 1s.
-        :return: The preprocessed state to be fed into a
-        model.
+        Saves the prediction model's weights and biases as plain
+        numpy arrays, for predictQValuesNumpy(). Needs to be called
+        every time the prediction model's weights change.
+        :return: Nothing...
+        """
+        self.predictionWeights = [[weight.astype(np.float32) for weight in layer.get_weights()]
+                                  for layer in self.predictionModel.layers]
+
+    def predictQValuesNumpy(self, states):
         """
-        return np.asarray(list(map(int, state)))[np.newaxis, :]
+        The same forward pass as the prediction model, but
+        with numpy matmuls on the cached weights. The network
+        is so small that going through TF costs far more than
+        the math, and the prediction model only changes every
+        replaceFrequency episodes anyway.
+        :param states: An (N, 11) float32 array of states
+        :return: The (N, 3) Q-values as a numpy array.
+        """
+        qValues = states
+        for weights, bias in self.predictionWeights[:-1]:
+            qValues = np.maximum(qValues @ weights + bias, 0)  # ReLU
+        # The output layer has no activation...
+        weights, bias = self.predictionWeights[-1]
+        return qValues @ weights + bias
+
+    @tf.function(jit_compile=True)
+    def fitBatch(self, states, actions, qTargets):
+        """
+        One gradient step of the target model towards the given
+        Q-value targets, with an MSE loss. The forward pass, loss, gradients,
+        and Adam update all get compiled by XLA into a single graph,
+        since at these sizes it's the kernel launches that cost the most.
+        Everything stays on the device, so there's no sync with the host
+        and no fresh host buffers to allocate in the middle of a step.
+        :param states: A (batchSize, 11) float32 tensor of states
+        :param actions: The (batchSize,) indices of the actions taken
+        :param qTargets: The (batchSize,) float32 targets for those actions
+        :return: The loss, as a tensor.
+        """
+        with tf.GradientTape() as tape:
+            qValues = self.targetModel(states, training=True)
+            # Eventually, when we train our network, the 'y' should be a
+            # matrix. However, we only have 'y' values for the actions we took, not
+            # the actions we didn't take. It is ideal if we did NOT adjust these weights.
+            # To make sure the non-actions' weights don't change, the 'y' values for
+            # these actions WILL BE THE SAME as the output of the TARGET network..
+            # So start with the outputs from the TARGET network, and overwrite
+            # the Q-values corresponding to the actions with the targets...
+            indices = tf.stack([tf.range(tf.shape(actions)[0]), actions], axis=1)
+            y = tf.tensor_scatter_nd_update(tf.stop_gradient(qValues), indices, qTargets)
+            loss = tf.reduce_mean(tf.square(qValues - y))
+        gradients = tape.gradient(loss, self.targetModel.trainable_variables)
+        self.optimizer.apply_gradients(zip(gradients, self.targetModel.trainable_variables))
+        return loss
+
+    def preprocessStates(self, states):
+        """
+        The states returned from our snakes are 11-bit integers,
+        which we need as an actual array of 0s and 1s. They index
+        straight into the decoded rows in STATE_BITS, so this is
+        just one gather.
+        :param states: A list of the states as integers in [0, 2048)
+        :return: An (N, 11) float32 array of 0s and 1s, ready
+        to be fed into a model.
+        """
+        return STATE_BITS[states]
 
     def addExperienceMemory(self):
         """
         Using the given memory length, we fill up a memory buffer
         with state, action, reward, and next state tuples. The goal is
         for these to be passed into the model for training...
+        All the environments are stepped together, so the network
+        only gets called once per step for all of them.
         If a game over is encountered during the fill-up,
-        then the environment and agent are reset, and the game
+        then that environment and agent are reset, and the game
         starts again...
-        :return: A memory list of state, action, reward, next state,
-        and game over tuples.
-        """
-        # We add batch size number of states. At the start, the memory
-        # won't be that full, but it's fine, because it's only a couple
-        # of rounds...We keep track of what episode we're on...
-        for _ in range(self.batchSize):
-            currState = self.env.encodeCurrentState()
-            # We do an epsilon greedy action selection,
-            if np.random.rand() < self.epsilon:
-                actionIndex = np.random.choice(np.arange(len(self.agent.actionList)))
-            else:  # Otherwise, we pass the preprocessed state through the network and choose the best one...
-                actionOutput = self.predictionModel.predict(self.preprocessState(currState))
-                actionIndex = np.argmax(actionOutput[0])
-            chosenAction = self.agent.actionList[actionIndex]
-            # Step forward...
-            _, reward, gameOver = self.env.stepForward(chosenAction)
-            # Encode the new state...
-            nextState = self.env.encodeCurrentState()
-            # Add the tuple to the memory buffer. If it was a
-            # game over, then increment the episode count...
-            self.memory.append([currState, actionIndex, reward, nextState, gameOver])
-            # If the game is over, reset the environment, increment the
-            # episode count, and decay the epsilon.
-            if gameOver:
-                self.env.reset()
-                self.episodeCount += 1
-                self.epsilon *= self.epsilonDecayFactor
+        The states are decoded into arrays right here, so that
+        sampling doesn't have to do it again every training step.
+        Every field is written straight into its own memory array.
+        :return: Nothing...
+        """
+        # We add batch size number of states, spread out over all the
+        # environments. At the start, the memory won't be that full, but
+        # it's fine, because it's only a couple of rounds...We keep track
+        # of what episode we're on...
+        numSteps = -(-self.batchSize // self.numEnvs)
+        # All the random numbers for the epsilon greedy selection are drawn up front...
+        randomNumbers = np.random.rand(numSteps, self.numEnvs)
+        randomActions = np.random.randint(0, self.numActions, (numSteps, self.numEnvs))
+        for step in range(numSteps):
+            currStates = self.preprocessStates([env.encodeCurrentState() for env in self.envs])
+            # We do an epsilon greedy action selection for every environment at once.
+            # The network sees all the states in a single call...
+            greedyActions = self.predictQValuesNumpy(currStates).argmax(axis=1)
+            actionIndices = np.where(randomNumbers[step] < self.epsilon, randomActions[step], greedyActions)
+            nextStates, rewards, gameOvers = [], [], []
+            for env, actionIndex in zip(self.envs, actionIndices):
+                # Step forward, and encode the new state, both in one go...
+                nextState, reward, gameOver = env.step(actionIndex)
+                nextStates.append(nextState)
+                rewards.append(reward)
+                gameOvers.append(gameOver)
+            # Add the tuples to the memory buffer, wrapping around
+            # to the start if we go past the end...
+            writeIndices = (self.memoryIndex + np.arange(self.numEnvs)) % self.memoryLength
+            self.memoryStates.scatter_nd_update(writeIndices[:, np.newaxis], currStates)
+            self.memoryActions[writeIndices] = actionIndices
+            self.memoryRewards[writeIndices] = rewards
+            self.memoryNextStates[writeIndices] = self.preprocessStates(nextStates)
+            self.memoryGameOvers[writeIndices] = gameOvers
+            self.memoryIndex = (self.memoryIndex + self.numEnvs) % self.memoryLength
+            self.memorySize = min(self.memorySize + self.numEnvs, self.memoryLength)
+            for env, gameOver in zip(self.envs, gameOvers):
+                # If the game is over, reset the environment, increment the
+                # episode count, and decay the epsilon.
+                if gameOver:
+                    env.reset()
+                    self.episodeCount += 1
+                    self.epsilon *= self.epsilonDecayFactor
 
     def sampleExperienceReplay(self):
         """
         Using the batch size, returns a random sample of the replay. Additionally,
         it unpacks the states, actions, and returns. This is for easier feeding into
-        the model. It also preprocesses the states...
+        the model. The states were already preprocessed when they were added, and each
+        field has its own array, so this is just one fancy index per field...
         :return: A 5-tuple of the states, actions, rewards, next states, and
-        game overs, each in numpy format.
-        """
-        memoryLength = len(self.memory)
-        # Choose a random set of indices
-        chosenIndices = np.random.choice(np.arange(memoryLength), size=self.batchSize, replace=False)
-        sampledData = np.asarray([self.memory[index] for index in chosenIndices], dtype=object)
-        states = np.squeeze([self.preprocessState(state) for state in sampledData[:, 0]])
-        actions = sampledData[:, 1].astype(int)
-        rewards = sampledData[:, 2].astype(int)
-        nextStates = np.squeeze([self.preprocessState(state) for state in sampledData[:, 3]])  # Should also be (batchSize, 11)
-        gameOvers = sampledData[:, 4].astype(bool)
-        return states, actions, rewards, nextStates, gameOvers
+        game overs. The states are a tensor on the device, the rest are in numpy format.
+        """
+        # Choose a random set of indices out of the filled part of the memory
+        chosenIndices = self.sampler.choice(self.memorySize, size=self.batchSize, replace=False)
+        return (tf.gather(self.memoryStates, chosenIndices), self.memoryActions[chosenIndices],
+                self.memoryRewards[chosenIndices], self.memoryNextStates[chosenIndices],
+                self.memoryGameOvers[chosenIndices])
 
     def trainStep(self):
         """
         Trains for just ONE BATCH of memory. If we have reached the number of batches where
         it's time to replace the prediction with the target, it will do that too.
+        The batch is sampled before this round's memory is added, and trained on in the
+        background while the environments play out the next round. TF lets go of
+        the GIL while it runs, so the two actually overlap.
+        :return: Nothing...
+        """
+        # The very first time, there's nothing to sample from yet...
+        if self.memorySize < self.batchSize:
+            self.addExperienceMemory()
+        # Grab the data, and start training on it...
+        training = self.trainingThread.submit(self.trainOnBatch, *self.sampleExperienceReplay())
+        self.addExperienceMemory()  # Add some memory for next time...
+        training.result()
+        # Every replaceFrequency episodes, the prediction model catches up to the target...
+        if self.episodeCount - self.lastReplaceEpisode >= self.replaceFrequency:
+            self.predictionModel.set_weights(self.targetModel.get_weights())
+            self.cachePredictionWeights()
+            self.lastReplaceEpisode = self.episodeCount
+
+    def trainOnBatch(self, states, actions, rewards, nextStates, gameOvers):
+        """
+        Builds the Q-value targets for a sampled batch, and takes one
+        training step of the target model towards them.
         :return: Nothing...
         """
-        self.addExperienceMemory()  # First add some memory...
-        # Grab the data...
-        states, actions, rewards, nextStates, gameOvers = self.sampleExperienceReplay()
-        # Eventually, when we call "train" on our network, the 'y' should be a
-        # matrix. However, we only have 'y' values for the actions we took, not
-        # the actions we didn't take. It is ideal if we did NOT adjust these weights.
-        # To make sure the non-actions' weights don't change, the 'y' values for
-        # these actions WILL BE THE SAME as the output of the TARGET network..
-        # So start with the outputs from the TARGET network...
-        currentQValues = self.targetModel.predict(states)
-        # Get the maximum Q values for the next states...
-        nextQValues = self.predictionModel.predict(nextStates)
-        maxNextQ = np.max(nextQValues, axis=1)
-        # On our currentQValues matrix, update the Q-values
-        # corresponding to the actions with the update formula...
-        qValsToUpdate = currentQValues[np.arange(currentQValues.shape[0]), actions]
-        currentQValues[np.arange(currentQValues.shape[0]), actions] = (1 - self.lr) * qValsToUpdate + \
-            self.lr * (rewards + self.gamma * maxNextQ)
-        # Now our matrix is ready for training...
-        self.targetModel.train_on_batch(x=states, y=currentQValues)
+        # Get the maximum Q values for the next states. If the game
+        # was over, there is no next state, so the target is just the reward.
+        # The optimizer's learning rate takes care of how far we move towards them...
+        nextQValues = self.predictQValuesNumpy(nextStates)
+        qTargets = np.where(gameOvers, rewards, rewards + self.gamma * nextQValues.max(axis=1)).astype(np.float32)
+        # Now the targets are ready for training...
+        self.fitBatch(states, actions, qTargets)
 
 if __name__ == '__main__':
     binaryDQN = BinaryDQN(boardSize=15)
     binaryDQN.addExperienceMemory()
-    print(f'Experience Memory (Length = {len(binaryDQN.memory)}): {pprint.pformat(binaryDQN.memory)}')
+    print(f'Experience Memory (Length = {binaryDQN.memorySize}): '
+          f'{pprint.pformat(binaryDQN.memoryStates[:binaryDQN.memorySize])}')
     states, actions, rewards, nextStates, gameOvers = binaryDQN.sampleExperienceReplay()
     print(f'States: {states}')
     print(f'Next States: {nextStates}')
@@ -10,57 +10,170 @@ The actual snake mechanices are implemented
 here, while the environment simply houses the
 board and the food.
 """
-import copy
+import numpy as np
+from numba import njit
+
+# Directions and turns are stored as integers, as
+# indices into these strings...
+DIRECTIONS = 'UDLR'
+# Direction is from the snake's
+# perspective. Direction itself
+# is up, down, left, right. But
+# snake's turning is from the
+# snake's perspective e.g.
+# moving down and turning left
+# means the snake is now going RIGHT.
+# The turns work out like:
+#   U: F -> U, L -> L, R -> R
+#   D: F -> D, L -> R, R -> L
+#   L: F -> L, L -> D, R -> U
+#   R: F -> R, L -> U, R -> D
+# Opposite directions only differ in the lowest bit, and
+# turning always flips the higher bit (vertical <-> horizontal).
+# Whether the lowest bit flips too depends on whether we're
+# going horizontally and whether it's a right turn, so the
+# whole thing is an XOR. See turnDirection().
+# Every snake starts out in the top corner going right...
+START_DIRECTION = DIRECTIONS.index('R')
+# How the head moves (row, column) for each direction...
+DELTA_R = np.array([-1, 1, 0, 0], dtype=np.int16)
+DELTA_C = np.array([0, 0, -1, 1], dtype=np.int16)
+# The squares (row, column offsets from the head) in front, to
+# the left, and to the right of the snake for each direction...
+PROXIMITY = (
+    ((-1, 0), (0, -1), (0, 1)),  # U
+    ((1, 0), (0, 1), (0, -1)),   # D
+    ((0, -1), (1, 0), (-1, 0)),  # L
+    ((0, 1), (-1, 0), (1, 0))    # R
+)
+
+
+@njit(cache=True)
+def turnDirection(direction, turn):
+    """
+    The direction the snake goes in after making a turn.
+    :param direction: The index of the direction in DIRECTIONS
+    :param turn: The index of the turn in SnakeAgent.ACTIONS
+    :return: The index of the new direction
+    """
+    if turn == 0:
+        return direction
+    return direction ^ (2 | ((direction >> 1) ^ (turn - 1)))
+
+
+@njit(cache=True)
+def moveSnake(rows, cols, occupied, headIndex, length, direction, turn, boardSize, fruitR, fruitC):
+    """
+    The compiled core of makeMove(). The body lives in the ring
+    buffers rows and cols, going from the tail at
+    headIndex - length + 1 up to the head at headIndex. Moving
+    writes the new head after the old one, and the tail drops off
+    by itself because the length stays the same. Eating a fruit
+    just makes the length one longer instead, so nothing gets
+    shifted. occupied is the board, marking which squares the
+    body is on, and is kept in sync.
+    :return: The new head index, length, direction, the reward,
+    and whether it was a game over.
+    """
+    capacity = rows.shape[0]
+    newDirection = turnDirection(direction, turn)
+    newR = rows[headIndex] + DELTA_R[newDirection]
+    newC = cols[headIndex] + DELTA_C[newDirection]
+    # Where the tail is, before the new head possibly goes on top of it in the buffer...
+    tailIndex = (headIndex - length + 1) % capacity
+    tailR, tailC = rows[tailIndex], cols[tailIndex]
+    headIndex = (headIndex + 1) % capacity
+    rows[headIndex] = newR
+    cols[headIndex] = newC
+    # Check to see if we're about to eat a fruit. The fruit is never on
+    # the body, so we can't crash doing it, and the tail stays where it
+    # was to extend. The length just goes up by one...
+    if newR == fruitR and newC == fruitC:
+        occupied[newR, newC] = True
+        return headIndex, length + 1, newDirection, 10, False
+    # Otherwise the tail moves out of the way first, so
+    # that it doesn't count as something we can crash into.
+    occupied[tailR, tailC] = False
+    # Check to see if we've crashed...
+    # Either we went out of bounds or ate ourself.
+    if newR < 0 or newR >= boardSize or newC < 0 or newC >= boardSize or occupied[newR, newC]:
+        return headIndex, length, newDirection, -10, True
+    occupied[newR, newC] = True
+    return headIndex, length, newDirection, 0, False  # We didn't crash or eat, so no reward
+
+
+@njit(cache=True)
+def resetSnake(rows, cols, occupied):
+    """
+    Puts a snake back in the top corner, three long
+    and going right, clearing its board first.
+    :return: The head index, length, and direction.
+    """
+    occupied[:, :] = False
+    for i in range(3):
+        rows[i] = 0
+        cols[i] = i
+        occupied[0, i] = True
+    return 2, 3, START_DIRECTION
 
 
 class SnakeAgent:
-    def __init__(self):
-        self.currentFrame = []
+    # The turns the snake can make. These never change,
+    # so every agent shares them...
+    ACTIONS = ('F', 'L', 'R')
+    # Each turn mapped to its index, the way moveSnake() wants it...
+    ACTION_INDICES = {turn: index for index, turn in enumerate(ACTIONS)}
+    # Agents get made by the hundreds and their fields get read every
+    # move, so they're fixed slots instead of a __dict__...
+    __slots__ = ('score', 'boardSize', 'rows', 'cols', 'occupied', 'headIndex', 'directionIndex', 'gameOver')
+
+    def __init__(self, boardSize=10):
         self.score = 0
-        self.actionList = ['F', 'L', 'R']
-        # Direction is from the snake's
-        # perspective. Direction itself
-        # is up, down, left, right. But
-        # snake's turning is from the
-        # snake's perspective e.g.
-        # moving down and turning left
-        # means the snake is now going RIGHT.
-        self.DIR_RESULT = {
-            'U': {
-                'F': 'U',
-                'L': 'L',
-                'R': 'R'
-            },
-            'D': {
-                'F': 'D',
-                'L': 'R',
-                'R': 'L'
-            },
-            'L': {
-                'F': 'L',
-                'L': 'D',
-                'R': 'U'
-            },
-            'R': {
-                'F': 'R',
-                'L': 'U',
-                'R': 'D'
-            }
-        }
-        self.direction = ''
+        # The body is stored as two ring buffers, one for the rows and
+        # one for the columns, big enough to hold a snake filling the
+        # whole board. They get allocated in reset()...
+        self.boardSize = 0
+        self.rows = np.zeros(0, dtype=np.int16)
+        self.cols = np.zeros(0, dtype=np.int16)
+        self.occupied = np.zeros((0, 0), dtype=bool)
+        self.headIndex = 0
+        self.directionIndex = 0
         self.gameOver = False
-        self.reset()
+        self.reset(boardSize)
 
-    def reset(self):
+    @property
+    def direction(self):
+        """
+        The direction the snake is going in, as one of 'U', 'D', 'L', 'R'.
+        """
+        return DIRECTIONS[self.directionIndex]
+
+    @property
+    def currentFrame(self):
+        """
+        The locations of the snake's body, from the tail
+        to the head, as a (length, 2) array of rows and columns.
+        """
+        tailIndex = self.headIndex - self.score + 1
+        if tailIndex >= 0:
+            # The body doesn't wrap around the end of the buffers, so just slice...
+            bodyRows = self.rows[tailIndex:self.headIndex + 1]
+            bodyCols = self.cols[tailIndex:self.headIndex + 1]
+        else:
+            bodyRows = np.concatenate((self.rows[tailIndex:], self.rows[:self.headIndex + 1]))
+            bodyCols = np.concatenate((self.cols[tailIndex:], self.cols[:self.headIndex + 1]))
+        return np.stack((bodyRows, bodyCols), axis=1)
+
+    def reset(self, boardSize=None):
         # Clean the previous states,
         # and put the snake in the top corner...
-        # actionsRewards is one behind, because
-        # it needs to match up against the previous
-        # state, since it's storing the RESULT of
-        # turning from that state.
-        self.currentFrame = [(0, 0), (0, 1), (0, 2)]
-        self.score = 3
-        self.direction = 'R'
+        # The buffers only need to be made again if the board size changed.
+        if boardSize is not None and boardSize != self.boardSize:
+            self.boardSize = boardSize
+            self.rows = np.zeros(boardSize * boardSize, dtype=np.int16)
+            self.cols = np.zeros(boardSize * boardSize, dtype=np.int16)
+            self.occupied = np.zeros((boardSize, boardSize), dtype=bool)
+        self.headIndex, self.score, self.directionIndex = resetSnake(self.rows, self.cols, self.occupied)
         self.gameOver = False
 
     def makeMove(self, turn, env):
@@ -76,51 +189,14 @@ class SnakeAgent:
         :param env: An instance of SnakeGame
         :return: The reward and whether it was a game over...
         """
-        if turn not in self.actionList:
+        turnIndex = SnakeAgent.ACTION_INDICES.get(turn)
+        if turnIndex is None:
             raise ValueError(f'Action "{turn}" not in the action list!')
-        if self.gameOver:
-            print('Game is over! Please reset!')
-            return
-        newState = copy.deepcopy(self.currentFrame)
-        newDirection = self.DIR_RESULT[self.direction][turn]
-        for i in range(self.score - 1):
-            newState[i] = newState[i + 1]
-        # If we didn't change direction, push everything one...
-        if newDirection == self.direction:
-            # Using the current direction, update the head...
-            if self.direction == 'U':
-                newState[-1] = (newState[-1][0] - 1, newState[-1][1])
-            elif self.direction == 'D':
-                newState[-1] = (newState[-1][0] + 1, newState[-1][1])
-            elif self.direction == 'L':
-                newState[-1] = (newState[-1][0], newState[-1][1] - 1)
-            else:
-                newState[-1] = (newState[-1][0], newState[-1][1] + 1)
-        # Changed direction.
-        else:
-            if newDirection == 'U':
-                newState[-1] = (newState[-2][0] - 1, newState[-2][1])
-            elif newDirection == 'D':
-                newState[-1] = (newState[-2][0] + 1, newState[-2][1])
-            elif newDirection == 'L':
-                newState[-1] = (newState[-2][0], newState[-2][1] - 1)
-            else:
-                newState[-1] = (newState[-2][0], newState[-2][1] + 1)
-        # Check to see if we've crashed...
-        # Either we ate ourself or went out of bounds.
-        if (newState[-1] in newState[:-1]) or \
-                (any(r < 0 or c < 0 or r >= env.boardSize or c >= env.boardSize for r, c in newState)):
-            self.gameOver = True
-            reward = -10
-        # Check to see if we've eaten a fruit.
-        # Use the tail location of the previous
-        # state to extend. Takes care of weird edge cases.
-        elif newState[-1] == env.fruitLoc:
-            newState.insert(0, self.currentFrame[0])
-            self.score += 1
-            reward = 10
-        else:
-            reward = 0  # We didn't crash or eat, so no reward
-        self.direction = newDirection  # Set to new direction...
-        self.currentFrame = newState
+        # The environment already won't step a finished game, so
+        # this is only checked when running without -O...
+        if __debug__ and self.gameOver:
+            raise RuntimeError('Game is over! Please reset!')
+        self.headIndex, self.score, self.directionIndex, reward, self.gameOver = \
+            moveSnake(self.rows, self.cols, self.occupied, self.headIndex, self.score, self.directionIndex,
+                      turnIndex, env.boardSize, env.fruitR, env.fruitC)
         return reward, self.gameOver
@@ -14,10 +14,11 @@ of the snake at each frame.
 """
 
 import numpy as np
-from itertools import product
-import imageio
-import os
-from .SnakeAgent import SnakeAgent
+from numba import njit
+from .SnakeAgent import SnakeAgent, PROXIMITY, moveSnake
+
+# PROXIMITY as one array, so the compiled code can index it by direction...
+PROXIMITY_ARRAY = np.array(PROXIMITY, dtype=np.int16)
 
 
 class SnakeGame:
@@ -38,18 +39,31 @@ class SnakeGame:
         # Don't pay attention to the values here.
         # They'll get reset. It's just so my IDE can
         # recognize the data types used :)
-        self.fruitLoc = (0, 0)
+        self.fruitR = 0
+        self.fruitC = 0
         self.placedFruit = False
+        # The encoding of the current state, saved the first time it's asked
+        # for. It's None whenever the snake or fruit has moved since...
+        self.encodedState = None
         self.reset()
 
+    @property
+    def fruitLoc(self):
+        """
+        The (row, column) of the fruit. The row and column are
+        kept separately, so the game loops don't have to unpack this.
+        """
+        return self.fruitR, self.fruitC
+
     def reset(self):
         """
         Resets the board along with the agent.
         A new fruit is placed on the empty board...
         :return: The starting state of the environment
         """
-        self.agent.reset()
-        self.placeFruit(self.agent.currentFrame)
+        self.agent.reset(self.boardSize)
+        self.encodedState = None
+        self.placeFruit()
         startState = {
             'boardSize': self.boardSize,
             'snakeLocs': self.agent.currentFrame,
@@ -57,21 +71,25 @@ class SnakeGame:
         }
         return startState
 
-    def placeFruit(self, snakeLocs):
+    def placeFruit(self, snakeLocs=None):
         """
         Places the fruit at random depending on the
         location of the snake. You should call this
         from the agent right after resetting and right
         after a fruit is eaten.
-        :param snakeLocs:
+        :param snakeLocs: Not used anymore. The empty squares come
+        straight from the agent's occupancy board now, but it's still
+        taken so that older code passing the snake's locations works...
         :return:
         """
-        validLocs = [(r, c) for r, c in product(range(self.boardSize), repeat=2)
-                     if (r, c) not in snakeLocs]
+        # The empty squares are the ones not on the agent's occupancy board,
+        # as flat indices in row by row order...
+        validLocs = np.flatnonzero(~self.agent.occupied)
         # Randomly select one...
-        selectionIndex = np.random.choice(len(validLocs))
-        self.fruitLoc = validLocs[selectionIndex]
+        selectionIndex = np.random.randint(len(validLocs))
+        self.fruitR, self.fruitC = divmod(int(validLocs[selectionIndex]), self.boardSize)
         self.placedFruit = True
+        self.encodedState = None
         return
 
     def stepForward(self, action):
@@ -91,10 +109,13 @@ class SnakeGame:
         if self.agent.gameOver:
             raise ValueError('Game is already over. Please reset!')
         reward, gameOver = self.agent.makeMove(action, env=self)
+        self.encodedState = None
         # We check to see if the snake grow by looking at the reward...
         if reward > 0:
-            self.placeFruit(self.agent.currentFrame)
-        # Return the new state as dictionary, along with reward and game over...
+            self.placeFruit()
+        # Return the new state as dictionary, along with reward and game over.
+        # currentFrame is a new array every time, so it's safe
+        # to keep around even though the agent moves its body in place...
         newState = {
             'boardSize': self.boardSize,
             'snakeLocs': self.agent.currentFrame,
@@ -102,13 +123,40 @@ class SnakeGame:
         }
         return newState, reward, gameOver
 
+    def step(self, turnIndex):
+        """
+        Same as stepForward(), but for learners that only need the
+        encoded state. The move and the encoding of the state it leads
+        to happen in one compiled call to stepSnake(), and the body
+        isn't copied out for a state dictionary.
+        :param turnIndex: The index of the action to take in SnakeAgent.ACTIONS
+        :return: The new state encoded like encodeCurrentState(),
+        the reward, and game over.
+        """
+        agent = self.agent
+        if agent.gameOver:
+            raise ValueError('Game is already over. Please reset!')
+        agent.headIndex, agent.score, agent.directionIndex, reward, agent.gameOver, coding = \
+            stepSnake(agent.rows, agent.cols, agent.occupied, agent.headIndex, agent.score, agent.directionIndex,
+                      turnIndex, self.boardSize, self.fruitR, self.fruitC)
+        self.encodedState = coding
+        # The fruit got eaten, so the encoding is for a fruit
+        # that isn't there anymore. Place a new one and redo it...
+        if reward > 0:
+            self.placeFruit()
+            coding = self.encodeCurrentState()
+        return coding, reward, agent.gameOver
+
     def encodeCurrentState(self):
         """
         Primarily internal method. It will take the current
         state of the snake, and encode it according to our rules.
         It will use the most recent location of the snake in
-        the environment variables.
-        :return: The state coded as an 11-bit string:
+        the environment variables. The encoding is only worked
+        out once per state, since the learners ask for it both as
+        the next state of one move and the state of the next move.
+        :return: The state coded as an 11-bit integer. From the
+        highest bit down:
             - Is there immediate danger in front, left,
             or right of the snake?
             - The direction of the fruit (up, down, left,
@@ -119,67 +167,57 @@ class SnakeGame:
         Thus, the coding is [danger ==> 'FLR']
         [fruit direction ==> 'UDLR']
         [snake direction ==> 'UDLR'] (mutually exclusive)
+        e.g. format(coding, '011b') gives the bits as a string.
+        Since it's a number between 0 and 2^11 - 1, it's also
+        directly the row of the state in a Q-table.
         """
-        directionCode = {
-            'U': '1000',
-            'D': '0100',
-            'L': '0010',
-            'R': '0001'
-        }
-        coding = ''
-        # For immediate danger, we look at the snake head, and see
-        # if either the edge of the board or a snake body part is
-        # next to it. The array is in FLR order.
-        head = self.agent.currentFrame[-1]
-        snakeDirection = self.agent.direction
-        if snakeDirection == 'U':
-            proximity = [
-                (head[0] - 1, head[1]),
-                (head[0], head[1] - 1),
-                (head[0], head[1] + 1)
-            ]
-        elif snakeDirection == 'D':
-            proximity = [
-                (head[0] + 1, head[1]),
-                (head[0], head[1] + 1),
-                (head[0], head[1] - 1)
-            ]
-        elif snakeDirection == 'L':
-            proximity = [
-                (head[0], head[1] - 1),
-                (head[0] + 1, head[1]),
-                (head[0] - 1, head[1])
-            ]
-        else:
-            proximity = [
-                (head[0], head[1] + 1),
-                (head[0] - 1, head[1]),
-                (head[0] + 1, head[1])
-            ]
-        # Lotta stuff going on here:
-        #   Check if each location is in the snake body
-        #   or off the board. Convert the Trues and Falses
-        # into a bit string we can directly attach to our coding.
-        dangers = ((r, c) in self.agent.currentFrame or not (0 <= r < self.boardSize and 0 <= c < self.boardSize)
-                   for r, c in proximity)
-        coding += ''.join(map(lambda x: str(int(x)), dangers))
-        # Now the fruit location. The fruit can't be both above and
-        # below the snake, so append in pairs.
-        fruitR, fruitC = self.fruitLoc
-        if head[0] > fruitR:
-            coding += '10'
-        elif head[0] < fruitR:
-            coding += '01'
-        else:
-            coding += '00'  # The fruit is on the same row
-        # Left/right
-        if head[1] > fruitC:
-            coding += '10'
-        elif head[1] < fruitC:
-            coding += '01'
-        else:
-            coding += '00'
+        if self.encodedState is not None:
+            return self.encodedState
+        # The actual encoding happens in compiled code, in
+        # encodeSnake(), straight off the agent's buffers...
+        agent = self.agent
+        coding = encodeSnake(agent.rows[agent.headIndex], agent.cols[agent.headIndex], agent.directionIndex,
+                             agent.occupied, self.boardSize, self.fruitR, self.fruitC)
+        self.encodedState = coding
+        return coding
+
+
+@njit(cache=True)
+def stepSnake(rows, cols, occupied, headIndex, length, direction, turn, boardSize, fruitR, fruitC):
+    """
+    moveSnake() and the encoding of the state it leads to in one
+    go, so SnakeGame.step() only needs one call into compiled code.
+    The encoding is the same as encodeCurrentState(), with the fruit
+    where it was before the move.
+    :return: The new head index, length, direction, the reward,
+    whether it was a game over, and the encoded state.
+    """
+    headIndex, length, direction, reward, gameOver = \
+        moveSnake(rows, cols, occupied, headIndex, length, direction, turn, boardSize, fruitR, fruitC)
+    coding = encodeSnake(rows[headIndex], cols[headIndex], direction, occupied, boardSize, fruitR, fruitC)
+    return headIndex, length, direction, reward, gameOver, coding
+
 
-        # Now the direction of the snake...Straightforward...
-        coding += directionCode[snakeDirection]
-        return coding
\ No newline at end of file
+@njit(cache=True)
+def encodeSnake(headR, headC, direction, occupied, boardSize, fruitR, fruitC):
+    """
+    The compiled core of encodeCurrentState(), straight
+    from the snake's head, direction, and occupancy board.
+    For immediate danger, we look at the squares in front, left, and
+    right of the head (PROXIMITY, in FLR order), and see if either
+    the edge of the board or a snake body part is there.
+    :return: The encoded state, as an 11-bit integer.
+    """
+    coding = 0
+    for i in range(3):
+        r = headR + PROXIMITY_ARRAY[direction, i, 0]
+        c = headC + PROXIMITY_ARRAY[direction, i, 1]
+        # No short circuiting, so there's nothing to branch on. Squares off the
+        # board get clamped back onto it to be looked up, but count as danger anyway...
+        offBoard = (r < 0) | (r >= boardSize) | (c < 0) | (c >= boardSize)
+        danger = offBoard | occupied[min(max(r, 0), boardSize - 1), min(max(c, 0), boardSize - 1)]
+        coding = (coding << 1) | danger
+    coding = (coding << 4) | (headR > fruitR) << 3 | (headR < fruitR) << 2 \
+        | (headC > fruitC) << 1 | (headC < fruitC)
+    coding = (coding << 4) | 1 << (3 - direction)
+    return coding
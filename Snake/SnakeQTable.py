@@ -5,18 +5,20 @@ Creation Date: 2020-09-30
 
 This file implements the Q-table for the
 snake game. The states are coded as 11-bit
-strings, and there are only 3 actions
+integers, and there are only 3 actions
 (forward, left, and right). Thus, the Q-table
 is a pretty straightforward 2^11 by 3 table.
 """
 
 import numpy as np
-from .SnakeAgent import SnakeAgent
-from .SnakeEnv import SnakeGame
-from .utils import *
-from typing import List
+from .SnakeAgent import SnakeAgent, moveSnake, resetSnake
+from .SnakeEnv import SnakeGame, encodeSnake
+from .VectorSnakeAgent import VectorSnakeAgent, placeSnakeFruit, splitMix
+from .utils import exportGIF
 import os
 import argparse
+import multiprocessing as mp
+from numba import njit
 
 
 class SnakeQTable:
@@ -29,9 +31,27 @@ class SnakeQTable:
         self.epsilonDecay = 0.0005
         self.minEpsilon = 0.01
         self.gamma = 0.9
-        self.Qtable = np.zeros((2 ** 11, 3), dtype=float)
-        self.agent = SnakeAgent()
+        # A game gets cut off after this many moves
+        self.maxSteps = 10000
+        # How many random numbers playGame() draws from numpy at a time...
+        self.randomBatchSize = 64
+        # playGame() writes each game's memory into these, so they only get made once.
+        # The next state of each move is the state of the move after it,
+        # so the states only get stored once...
+        self.memoryStates = np.zeros(self.maxSteps + 1, dtype=np.uint16)
+        self.memoryActions = np.zeros(self.maxSteps, dtype=np.uint8)
+        self.memoryRewards = np.zeros(self.maxSteps, dtype=np.int8)
+        self.memoryGameOvers = np.zeros(self.maxSteps, dtype=bool)
+        # float32 is plenty of precision for the Q-values, and half
+        # the memory to move around as float64...
+        self.Qtable = np.zeros((2 ** 11, 3), dtype=np.float32)
+        self.agent = SnakeAgent(boardSize=boardSize)
         self.env = SnakeGame(snakeAgent=self.agent, boardSize=boardSize)
+        # Pinned here so the game loops don't have to go through the class every move...
+        self.actionList = SnakeAgent.ACTIONS
+        self.numActions = len(self.actionList)
+        # playVectorGames() makes these the first time it's called...
+        self.vectorAgent = None
 
     def playGame(self, makeGif=False, random=True):
         """
@@ -40,77 +60,351 @@ class SnakeQTable:
         epsilon is implemented to select actions.
         The epsilon also decays from one game to the
         next.
-        :return: The encoded game memory.
+        :return: The encoded game memory, as a 5-tuple of arrays: the
+        Q-table rows of the states, the action indices, the rewards, the rows
+        of the next states, and the game overs.
         """
         self.gamesPlayed += 1
-        stateCounts = 1
         # Reset the agent
         currentState = self.env.reset()
-        # Only save the frames if we're making a GIF...
+        # Only save the states if we're making a GIF. They're all
+        # drawn together at the end...
         allSnakeStates = []
         if makeGif:
-            allSnakeStates = [produceBoardFrame(currentState, scale=15)]  # One frame with the first state...
+            allSnakeStates = [currentState]  # One frame with the first state...
         gameOver = False
-        # This holds the encoded game memory in a format for Q-learning...
-        # It goes like [state, action, reward, nextState, gameOver]
-        gameMemory: List[List] = []
-        while not gameOver and stateCounts < 10000:
-            currentEncodedState = self.env.encodeCurrentState()
-            # If it's at least the second state, then it was the "next state"
-            # of the previous state/action...
-            if len(gameMemory) > 0:
-                gameMemory[-1][3] = currentEncodedState
+        # This holds the encoded game memory in a format for Q-learning,
+        # with one array per field...
+        states, actions, rewards, gameOvers = \
+            self.memoryStates, self.memoryActions, self.memoryRewards, self.memoryGameOvers
+        moves = 0
+        # The random numbers get drawn a batch at a time, instead of one call
+        # into numpy every move. Most games are over long before maxSteps,
+        # so drawing enough for all of those up front would mostly be wasted...
+        randomIndex = self.randomBatchSize
+        # Without exploration, the moves only depend on the board, so seeing the
+        # exact same board twice means the snake is going around in circles
+        # and will never stop. There's no point playing out to maxSteps...
+        visitedBoards = set()
+        while not gameOver and moves < self.maxSteps:
+            if not random:
+                board = (self.agent.currentFrame.tobytes(), self.agent.direction, self.env.fruitLoc)
+                if board in visitedBoards:
+                    break
+                visitedBoards.add(board)
+            row = self.env.encodeCurrentState()
             # With an epsilon% chance, choose
             # a random action. Otherwise, choose
             # the action with the largest Q-value.
-            if random and np.random.rand() < self.epsilon:
-                action = np.random.choice(self.agent.actionList)
+            if random and randomIndex == self.randomBatchSize:
+                randomNumbers = np.random.rand(self.randomBatchSize)
+                randomActions = np.random.randint(0, self.numActions, self.randomBatchSize)
+                randomIndex = 0
+            if random and randomNumbers[randomIndex] < self.epsilon:
+                actionIndex = randomActions[randomIndex]
             else:
-                row = int(currentEncodedState, 2)
-                rowData = self.Qtable[row]
-                action = self.agent.actionList[np.argmax(rowData)]
-            currentState, reward, gameOver = self.env.stepForward(action)
+                actionIndex = self.Qtable[row].argmax()
+            # Only the GIF needs the whole board. Otherwise, the
+            # encoding of the next state is all we want...
             if makeGif:
-                allSnakeStates.append(produceBoardFrame(currentState, scale=15))
-            # Append the state/action/reward/gameOver.
-            # Put a placeholder for the next state (gets filled in at the start of the next loop)
-            gameMemory.append([currentEncodedState, action, reward, '', gameOver])
-            stateCounts += 1
+                currentState, reward, gameOver = self.env.stepForward(self.actionList[actionIndex])
+                allSnakeStates.append(currentState)
+            else:
+                _, reward, gameOver = self.env.step(actionIndex)
+            # Write down the state/action/reward/gameOver...
+            states[moves] = row
+            actions[moves] = actionIndex
+            rewards[moves] = reward
+            gameOvers[moves] = gameOver
+            moves += 1
+            randomIndex += 1
         # Game is over, so add the last state to the game memory and return...
-        gameMemory[-1][3] = self.env.encodeCurrentState()
+        states[moves] = self.env.encodeCurrentState()
+        # The buffers get written over by the next game, so hand out copies...
+        gameMemory = (states[:moves].copy(), actions[:moves].copy(), rewards[:moves].copy(),
+                      states[1:moves + 1].copy(), gameOvers[:moves].copy())
         if self.agent.score > self.maxScore:
             self.maxScore = self.agent.score
         if makeGif:
-            exportGIF(frames=allSnakeStates, filename=os.path.join('QTable', f'Game{self.gamesPlayed}.gif'))
+            exportGIF(frames=allSnakeStates, filename=os.path.join('QTable', f'Game{self.gamesPlayed}.gif'), scale=15)
             print(f'Game {self.gamesPlayed} scored {self.agent.score}! '
                   f'Best Score: {self.maxScore})')
         return gameMemory
 
+    def playGameCompiled(self):
+        """
+        Plays a game of snake like playGame() does with exploration,
+        but the whole game runs in compiled code with playEpisode(),
+        picking actions straight from the Q-table. We only cross over
+        from Python once per game, instead of once per move. The game's
+        random numbers all come from one seed drawn from numpy, so
+        np.random.seed() still decides the whole run...
+        :return: The encoded game memory, in the same format as playGame().
+        """
+        self.gamesPlayed += 1
+        randomState = np.array([np.random.randint(0, 2 ** 63 - 1, dtype=np.int64)], dtype=np.uint64)
+        moves, score = playEpisode(self.Qtable, self.env.boardSize, self.epsilon, self.maxSteps, randomState,
+                                   self.memoryStates, self.memoryActions, self.memoryRewards, self.memoryGameOvers)
+        self.maxScore = max(self.maxScore, score)
+        # The buffers get written over by the next game, so hand out copies...
+        return (self.memoryStates[:moves].copy(), self.memoryActions[:moves].copy(),
+                self.memoryRewards[:moves].copy(), self.memoryStates[1:moves + 1].copy(),
+                self.memoryGameOvers[:moves].copy())
+
+    def playGames(self, numGames):
+        """
+        Plays numGames games of snake side by side, each with
+        its own agent and environment, until all of them reach a game
+        over. At every step, the epsilon-greedy action for every game
+        still going is picked at once, by pulling all of their rows
+        out of the Q-table together. The epsilon stays the same
+        for all of the games.
+        :param numGames: How many games to play
+        :return: A list of the encoded game memories, one per game, in
+        the same format as playGame().
+        """
+        agents = [SnakeAgent(boardSize=self.env.boardSize) for _ in range(numGames)]
+        envs = [SnakeGame(snakeAgent=agent, boardSize=self.env.boardSize) for agent in agents]
+        # Same layout as in playGame(), with a row per game. All the games
+        # move in lockstep, so they all write to the same column...
+        states = np.zeros((numGames, self.maxSteps + 1), dtype=np.uint16)
+        actions = np.zeros((numGames, self.maxSteps), dtype=np.uint8)
+        rewards = np.zeros((numGames, self.maxSteps), dtype=np.int8)
+        gameOvers = np.zeros((numGames, self.maxSteps), dtype=bool)
+        moves = np.zeros(numGames, dtype=int)
+        states[:, 0] = [env.encodeCurrentState() for env in envs]
+        # Looked up once, instead of every game every move...
+        envSteps = [env.step for env in envs]
+        # The indices of the games that haven't reached a game over yet...
+        activeGames = np.arange(numGames)
+        move = 0
+        while len(activeGames) > 0 and move < self.maxSteps:
+            randomActions = np.random.randint(0, self.numActions, len(activeGames))
+            actionIndices = np.where(np.random.rand(len(activeGames)) < self.epsilon, randomActions,
+                                     self.Qtable[states[activeGames, move]].argmax(axis=1))
+            actions[activeGames, move] = actionIndices
+            # Step the games into plain lists, and write them into
+            # the memory arrays together afterwards...
+            results = [envSteps[game](actionIndex) for game, actionIndex in
+                       zip(activeGames.tolist(), actionIndices.tolist())]
+            states[activeGames, move + 1], rewards[activeGames, move], gameOvers[activeGames, move] = zip(*results)
+            move += 1
+            moves[activeGames] = move
+            activeGames = activeGames[~gameOvers[activeGames, move - 1]]
+        self.gamesPlayed += numGames
+        self.maxScore = max(self.maxScore, max(agent.score for agent in agents))
+        return [(states[game, :moves[game]], actions[game, :moves[game]], rewards[game, :moves[game]],
+                 states[game, 1:moves[game] + 1], gameOvers[game, :moves[game]]) for game in range(numGames)]
+
+    def playVectorGames(self, numGames, numSnakes):
+        """
+        Plays at least numGames games of snake with a VectorSnakeAgent,
+        numSnakes at a time. Like in playGames(), the epsilon-greedy
+        actions are picked for every snake at once, but the snakes move
+        in compiled code, and a snake that dies starts a new game
+        straight away instead of waiting for the others. The agent and
+        its game memories are kept between calls, so the games still
+        going when we stop pick up where they left off next time, instead
+        of only the short games making it out. Like in playGame(), each
+        game gets cut off after maxSteps moves.
+        :param numGames: How many games to play
+        :param numSnakes: How many snakes to play side by side
+        :return: A list of the encoded game memories, one per finished
+        game, in the same format as playGame().
+        """
+        if self.vectorAgent is None or self.vectorAgent.numSnakes != numSnakes \
+                or self.vectorAgent.boardSize != self.env.boardSize:
+            self.vectorAgent = VectorSnakeAgent(numSnakes=numSnakes, boardSize=self.env.boardSize)
+            # Same layout as in playGame(), with a row per snake...
+            self.vectorStates = np.zeros((numSnakes, self.maxSteps + 1), dtype=np.uint16)
+            self.vectorActions = np.zeros((numSnakes, self.maxSteps), dtype=np.uint8)
+            self.vectorRewards = np.zeros((numSnakes, self.maxSteps), dtype=np.int8)
+            self.vectorGameOvers = np.zeros((numSnakes, self.maxSteps), dtype=bool)
+            # How many moves each snake is into its current game...
+            self.vectorMoves = np.zeros(numSnakes, dtype=np.int64)
+        vectorAgent = self.vectorAgent
+        states, actions, rewards, gameOvers, moves = \
+            self.vectorStates, self.vectorActions, self.vectorRewards, self.vectorGameOvers, self.vectorMoves
+        snakes = np.arange(numSnakes)
+        gameMemories = []
+        while len(gameMemories) < numGames:
+            states[snakes, moves] = vectorAgent.states
+            randomActions = np.random.randint(0, self.numActions, numSnakes)
+            actionIndices = np.where(np.random.rand(numSnakes) < self.epsilon, randomActions,
+                                     self.Qtable[vectorAgent.states].argmax(axis=1))
+            nextStates, stepRewards, stepGameOvers = vectorAgent.step(actionIndices)
+            actions[snakes, moves] = actionIndices
+            rewards[snakes, moves] = stepRewards
+            gameOvers[snakes, moves] = stepGameOvers
+            moves += 1
+            # A snake that died is already on its next game, so
+            # the next state has to come from what step() gave back...
+            states[snakes, moves] = nextStates
+            cutOff = moves == self.maxSteps
+            finishedSnakes = np.flatnonzero(stepGameOvers | cutOff)
+            if len(finishedSnakes) == 0:
+                continue
+            self.maxScore = max(self.maxScore, int(vectorAgent.scores[finishedSnakes].max()))
+            for snake in finishedSnakes.tolist():
+                end = moves[snake]
+                # The rows get written over by the snake's next game, so hand out copies...
+                gameMemories.append((states[snake, :end].copy(), actions[snake, :end].copy(),
+                                     rewards[snake, :end].copy(), states[snake, 1:end + 1].copy(),
+                                     gameOvers[snake, :end].copy()))
+            moves[finishedSnakes] = 0
+            # The games that got cut off didn't die, so they need starting over...
+            cutOffSnakes = np.flatnonzero(cutOff & ~stepGameOvers)
+            if len(cutOffSnakes) > 0:
+                vectorAgent.reset(cutOffSnakes)
+        self.gamesPlayed += len(gameMemories)
+        return gameMemories
+
+    def playGamesParallel(self, pool, numGames, numWorkers):
+        """
+        Splits numGames games over numWorkers worker processes, each
+        of which plays its share with playGames() on a snapshot of
+        the current Q-table and epsilon. Only the game memories come
+        back, so the table itself is still updated here in the main process.
+        :param pool: A multiprocessing Pool with numWorkers processes
+        :param numGames: How many games to play in total
+        :param numWorkers: How many workers to split the games over
+        :return: A list of the encoded game memories, one per game.
+        """
+        gamesPerWorker = [numGames // numWorkers + (worker < numGames % numWorkers)
+                          for worker in range(numWorkers)]
+        # Forked workers all start with the same random state, so each one gets its own seed...
+        seeds = np.random.randint(0, 2 ** 31 - 1, size=numWorkers)
+        results = pool.starmap(playGamesWorker, [(self.env.boardSize, self.Qtable, self.epsilon, workerGames, seed)
+                                                 for workerGames, seed in zip(gamesPerWorker, seeds)
+                                                 if workerGames > 0])
+        gameMemories = []
+        for workerMemories, workerMaxScore in results:
+            gameMemories.extend(workerMemories)
+            self.maxScore = max(self.maxScore, workerMaxScore)
+        self.gamesPlayed += numGames
+        return gameMemories
+
     def updateTable(self, gameMemory):
         """
         Given a game memory, this will update the Q-table based
         on Bellman's equation.
-        :param gameMemory: A single game's memory. Assumed to end
-        in a game over.
+        :param gameMemory: A single game's memory, as returned by
+        playGame(). Assumed to end in a game over.
         :return:
         """
-        for memory in gameMemory:
-            currState, turn, reward, nextState, gameOver = tuple(memory)
-            currRow = int(currState, 2)
-            currCol = self.agent.actionList.index(turn)
-            # If it's a game over, there is no maxNextQValue...
-            # ...However, we initialized the Q table with zeroes,
-            # so it checks out.
-            nextRow = self.Qtable[int(nextState, 2)]
-            maxNextQValue = max(nextRow)
-            # Update, Q(s, a) = Q(s, a) + alpha * ( r(s, a) + gamma * maxNextQValue - Q(s,a) )...
-            self.Qtable[currRow, currCol] += self.learningRate * (reward + self.gamma * maxNextQValue -
-                                                                  self.Qtable[currRow, currCol])
+        # The memory is already in arrays of rows, columns, and rewards,
+        # so the actual updating can happen in compiled code...
+        currRows, currCols, rewards, nextRows, _ = gameMemory
+        bellmanUpdate(self.Qtable, currRows, currCols, rewards, nextRows, self.learningRate, self.gamma)
         # Decay the epsilon...
         self.epsilon = max(self.epsilon * (1 - self.epsilonDecay), self.minEpsilon)
 
     def saveQTable(self, filename):
-        np.savetxt(filename, self.Qtable, delimiter=', ')
+        """
+        Saves the Q-table in numpy's binary .npy format. It's a straight
+        copy of the float32 buffer, instead of printing every Q-value
+        out as text, so it's a lot smaller and faster both ways...
+        :param filename: The file to save to. np.save adds
+        the .npy extension if it's not there
+        :return:
+        """
+        np.save(filename, self.Qtable)
+
+    def loadQTable(self, filename):
+        """
+        Loads a Q-table saved by saveQTable(). Tables from before
+        it saved in .npy, as comma separated text, load too.
+        :param filename: The .npy or .csv file to load from
+        :return:
+        """
+        if filename.endswith('.csv'):
+            self.Qtable = np.loadtxt(filename, delimiter=',', dtype=np.float32)
+        else:
+            self.Qtable = np.load(filename).astype(np.float32, copy=False)
+
+
+@njit(cache=True)
+def bellmanUpdate(Qtable, currRows, currCols, rewards, nextRows, learningRate, gamma):
+    """
+    Applies the Bellman update to Qtable in place, one move at a
+    time and in order, so a move sees the updates of the moves before it.
+    :param Qtable: The Q-table to update
+    :param currRows: The row of each state that a move was made from
+    :param currCols: The column of each action that was taken
+    :param rewards: The reward of each move
+    :param nextRows: The row of each state that a move ended up in
+    :param learningRate: Alpha in the update
+    :param gamma: The discount factor
+    :return:
+    """
+    for i in range(currRows.shape[0]):
+        currRow, currCol, nextRow = currRows[i], currCols[i], nextRows[i]
+        # If it's a game over, there is no maxNextQValue...
+        # ...However, we initialized the Q table with zeroes,
+        # so it checks out. There's only 3 actions, so
+        # just compare them directly...
+        maxNextQValue = max(Qtable[nextRow, 0], Qtable[nextRow, 1], Qtable[nextRow, 2])
+        # Update, Q(s, a) = Q(s, a) + alpha * ( r(s, a) + gamma * maxNextQValue - Q(s,a) )...
+        Qtable[currRow, currCol] += learningRate * (rewards[i] + gamma * maxNextQValue - Qtable[currRow, currCol])
+
+
+@njit(cache=True)
+def playEpisode(Qtable, boardSize, epsilon, maxSteps, randomState, states, actions, rewards, gameOvers):
+    """
+    Plays a whole game of snake from the start, with an
+    epsilon-greedy choice from Qtable at every move. The snake gets
+    its own buffers, and the game memory is written into the given arrays
+    with the same layout as SnakeQTable.playGame().
+    :param Qtable: The Q-table to pick the actions from
+    :param boardSize: Side length of the board
+    :param epsilon: Chance of picking a random action
+    :param maxSteps: The game gets cut off after this many moves
+    :param randomState: A one element uint64 array, the state splitMix()
+    draws the exploration and the fruit from. It gets stepped in place
+    :param states: Gets the state rows, one more than the number of moves
+    :param actions: Gets the action indices
+    :param rewards: Gets the rewards
+    :param gameOvers: Gets the game overs
+    :return: The number of moves, and the score at the end.
+    """
+    rows = np.zeros(boardSize * boardSize, dtype=np.int16)
+    cols = np.zeros(boardSize * boardSize, dtype=np.int16)
+    occupied = np.zeros((boardSize, boardSize), dtype=np.bool_)
+    headIndex, length, direction = resetSnake(rows, cols, occupied)
+    fruitR, fruitC = placeSnakeFruit(occupied, length, boardSize, randomState, 0)
+    states[0] = encodeSnake(rows[headIndex], cols[headIndex], direction, occupied, boardSize, fruitR, fruitC)
+    moves = 0
+    gameOver = False
+    while not gameOver and moves < maxSteps:
+        # The top 53 bits make a float in [0, 1)...
+        if (splitMix(randomState, 0) >> np.uint64(11)) * (1.0 / (1 << 53)) < epsilon:
+            action = np.int64(splitMix(randomState, 0) % np.uint64(Qtable.shape[1]))
+        else:
+            action = np.argmax(Qtable[states[moves]])
+        headIndex, length, direction, reward, gameOver = \
+            moveSnake(rows, cols, occupied, headIndex, length, direction, action, boardSize, fruitR, fruitC)
+        if reward > 0:
+            fruitR, fruitC = placeSnakeFruit(occupied, length, boardSize, randomState, 0)
+        actions[moves] = action
+        rewards[moves] = reward
+        gameOvers[moves] = gameOver
+        moves += 1
+        states[moves] = encodeSnake(rows[headIndex], cols[headIndex], direction, occupied, boardSize, fruitR, fruitC)
+    return moves, length
+
+
+def playGamesWorker(boardSize, Qtable, epsilon, numGames, seed):
+    """
+    The function each worker process runs for playGamesParallel().
+    It has to live at the module level so that it can be pickled.
+    :return: The game memories and the best score out of them.
+    """
+    np.random.seed(seed)
+    qtableObj = SnakeQTable(boardSize=boardSize)
+    qtableObj.Qtable = Qtable
+    qtableObj.epsilon = epsilon
+    gameMemories = qtableObj.playGames(numGames)
+    return gameMemories, qtableObj.maxScore
 
 
 if __name__ == '__main__':
@@ -118,16 +412,51 @@ if __name__ == '__main__':
 
     parser.add_argument('--games', type=int, default=5000,
                         help='The number of games to play')
+    parser.add_argument('--batch', type=int, default=1,
+                        help='The number of games to play side by side before the Q-table gets updated. '
+                             'These games all play against the same table and epsilon, so the default of 1 '
+                             'updates after every game')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='The number of processes to play games in. Each one plays --batch games at a time')
+    # These are different ways of playing the games, so only one can be picked...
+    playMode = parser.add_mutually_exclusive_group()
+    playMode.add_argument('--vector', action='store_true',
+                          help='Play the games with a VectorSnakeAgent, --batch snakes at a time')
+    playMode.add_argument('--compiled', action='store_true',
+                          help='Play each game entirely in compiled code, one after the other')
 
     args = parser.parse_args()
+    if args.workers > 1 and (args.vector or args.compiled):
+        parser.error('--workers only works with the default games, not with --vector or --compiled')
 
+    # The pool has to be forked before anything runs numba's parallel kernels
+    # (like making a VectorSnakeAgent). Forking after those threads have started
+    # leaves the workers hanging when the pool shuts down...
+    pool = mp.Pool(args.workers) if args.workers > 1 else None
     qtableObj = SnakeQTable()
-    for game in range(1, args.games + 1):
+    game = 0
+    while game < args.games:
+        numGames = min(args.batch * args.workers, args.games - game)
+        if args.vector:
+            gameMems = qtableObj.playVectorGames(numGames, args.batch)
+            numGames = len(gameMems)
+        elif args.compiled:
+            # Update straight after each game, so the next one plays with the newest table...
+            for _ in range(numGames):
+                qtableObj.updateTable(qtableObj.playGameCompiled())
+            gameMems = []
+        elif pool is not None:
+            gameMems = qtableObj.playGamesParallel(pool, numGames, args.workers)
+        else:
+            gameMems = qtableObj.playGames(numGames)
+        for gameMem in gameMems:
+            qtableObj.updateTable(gameMem)
+        game += numGames
         print(f'\rGame {game}...', end='')
-        gameMem = qtableObj.playGame()
-        qtableObj.updateTable(gameMem)
+    if pool is not None:
+        pool.close()
     print('\nFinal game...', 'Current epsilon is', qtableObj.epsilon)
     gameMem = qtableObj.playGame(makeGif=True, random=False)
-    qtableObj.saveQTable(f'{args.games}Played.csv')
+    qtableObj.saveQTable(f'{args.games}Played.npy')
 
 
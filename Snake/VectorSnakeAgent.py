@@ -0,0 +1,177 @@
+"""
+File: VectorSnakeAgent.py
+Location: /Snake/
+Creation Date: 2026-10-15
+
+This file implements many snake games stacked
+on top of each other, for when we want a lot of
+experience quickly. Each snake and its fruit are
+stored as a row in arrays shared by all of the
+games, and all of them move together in one compiled
+call, spread over the CPU cores. Finished games
+start over by themselves, so the snakes never
+have to wait for each other.
+"""
+import numpy as np
+from numba import njit, prange
+from .SnakeAgent import SnakeAgent, moveSnake, resetSnake
+from .SnakeEnv import encodeSnake
+
+
+class VectorSnakeAgent:
+    def __init__(self, numSnakes=64, boardSize=10, seed=None):
+        """
+        Makes numSnakes snakes, each on their own board, and
+        resets all of them. Board size larger than 5 is required.
+        :param numSnakes: How many games to play side by side
+        :param boardSize: Side length of every board
+        :param seed: Seed for the fruit placement. Each snake gets
+        its own stream of fruit off of it, so the games are the same
+        however the snakes get spread over threads. Without one,
+        the streams are seeded off of numpy's global random state...
+        """
+        if boardSize < 5:
+            raise ValueError("Board size of {} is too small!".format(boardSize))
+        self.numSnakes = numSnakes
+        self.boardSize = boardSize
+        self.actionList = SnakeAgent.ACTIONS
+        # Same ring buffers and occupancy boards as SnakeAgent,
+        # with a row for each snake...
+        self.rows = np.zeros((numSnakes, boardSize * boardSize), dtype=np.int16)
+        self.cols = np.zeros((numSnakes, boardSize * boardSize), dtype=np.int16)
+        self.occupied = np.zeros((numSnakes, boardSize, boardSize), dtype=bool)
+        self.headIndex = np.zeros(numSnakes, dtype=np.int64)
+        self.length = np.zeros(numSnakes, dtype=np.int64)
+        self.directionIndex = np.zeros(numSnakes, dtype=np.int64)
+        self.fruitR = np.zeros(numSnakes, dtype=np.int16)
+        self.fruitC = np.zeros(numSnakes, dtype=np.int16)
+        # The encoded state every snake is in right now. For
+        # a game that just ended, this is the start of the next one...
+        self.states = np.zeros(numSnakes, dtype=np.int64)
+        # The score each snake had at the end of the last step. For
+        # a game that just ended, this is its final score.
+        self.scores = np.zeros(numSnakes, dtype=np.int64)
+        # Each snake carries its own random state for its fruit, for splitMix()...
+        seeder = np.random if seed is None else np.random.RandomState(seed)
+        self.fruitSeeds = seeder.randint(0, 2 ** 63 - 1, size=numSnakes, dtype=np.int64).astype(np.uint64)
+        self.reset()
+
+    def reset(self, snakes=None):
+        """
+        Starts games over, every one of them by default.
+        :param snakes: The indices of the snakes to start over, if not all of them
+        :return: The encoded starting state of every snake.
+        """
+        if snakes is None:
+            snakes = np.arange(self.numSnakes)
+        snakes = np.asarray(snakes, dtype=np.int64)
+        resetSnakes(self.rows, self.cols, self.occupied, self.headIndex, self.length, self.directionIndex,
+                    self.fruitR, self.fruitC, self.fruitSeeds, self.states, self.boardSize, snakes)
+        self.scores[snakes] = self.length[snakes]
+        return self.states.copy()
+
+    def step(self, turns):
+        """
+        Moves every snake by one step. Any snake that reaches a
+        game over gets reset afterwards, so states has its next game's
+        starting state, while the returned next states have how the game ended.
+        :param turns: The index of the action in SnakeAgent.ACTIONS for each snake
+        :return: The encoded next state, reward, and game over for each snake.
+        """
+        nextStates = np.zeros(self.numSnakes, dtype=np.int64)
+        rewards = np.zeros(self.numSnakes, dtype=np.int64)
+        gameOvers = np.zeros(self.numSnakes, dtype=bool)
+        stepSnakes(self.rows, self.cols, self.occupied, self.headIndex, self.length, self.directionIndex,
+                   self.fruitR, self.fruitC, self.fruitSeeds, np.asarray(turns, dtype=np.int64), self.boardSize,
+                   self.states, nextStates, rewards, gameOvers, self.scores)
+        return nextStates, rewards, gameOvers
+
+
+@njit(cache=True)
+def splitMix(randomStates, index):
+    """
+    Steps randomStates[index] with splitmix64 and gives back the
+    random number that comes out. Numba's own random state belongs
+    to whichever thread draws from it, and np.random.seed() never
+    reaches it, so the compiled code carries its own states in
+    uint64 arrays instead. Each step is only a few multiplies and shifts.
+    :return: A random uint64.
+    """
+    randomStates[index] += np.uint64(0x9E3779B97F4A7C15)
+    z = randomStates[index]
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+@njit(cache=True)
+def pickFreeSquare(occupied, boardSize, selection):
+    """
+    Counts through the board to the empty square numbered selection.
+    :return: The row and column of that square.
+    """
+    for r in range(boardSize):
+        for c in range(boardSize):
+            if not occupied[r, c]:
+                if selection == 0:
+                    return r, c
+                selection -= 1
+    return -1, -1
+
+
+@njit(cache=True)
+def placeSnakeFruit(occupied, length, boardSize, fruitSeeds, snake):
+    """
+    Picks a random empty square for the fruit, the same as
+    SnakeGame.placeFruit(), but by counting through the board
+    instead of listing every empty square. The random number comes
+    from the snake's own state in fruitSeeds, so it doesn't matter
+    which thread the snake ends up on.
+    :return: The row and column of the fruit.
+    """
+    freeSquares = boardSize * boardSize - length
+    # The snake fills the whole board, so there's nowhere to put it...
+    if freeSquares <= 0:
+        return -1, -1
+    return pickFreeSquare(occupied, boardSize, np.int64(splitMix(fruitSeeds, snake) % np.uint64(freeSquares)))
+
+
+@njit(parallel=True, cache=True)
+def resetSnakes(rows, cols, occupied, headIndex, length, direction, fruitR, fruitC, fruitSeeds, states, boardSize,
+                snakes):
+    """
+    Resets the given snakes and places their fruit.
+    """
+    for i in prange(snakes.shape[0]):
+        k = snakes[i]
+        headIndex[k], length[k], direction[k] = resetSnake(rows[k], cols[k], occupied[k])
+        fruitR[k], fruitC[k] = placeSnakeFruit(occupied[k], length[k], boardSize, fruitSeeds, k)
+        states[k] = encodeSnake(rows[k, headIndex[k]], cols[k, headIndex[k]], direction[k], occupied[k],
+                                boardSize, fruitR[k], fruitC[k])
+
+
+@njit(parallel=True, cache=True)
+def stepSnakes(rows, cols, occupied, headIndex, length, direction, fruitR, fruitC, fruitSeeds, turns, boardSize,
+               states, nextStates, rewards, gameOvers, scores):
+    """
+    The compiled core of VectorSnakeAgent.step(). Every snake
+    is moved with moveSnake(), gets a new fruit if it ate one,
+    and gets its new state encoded, all in the same loop.
+    The snakes don't touch each other's rows, so they're split over threads.
+    """
+    for k in prange(rows.shape[0]):
+        headIndex[k], length[k], direction[k], rewards[k], gameOvers[k] = \
+            moveSnake(rows[k], cols[k], occupied[k], headIndex[k], length[k], direction[k], turns[k],
+                      boardSize, fruitR[k], fruitC[k])
+        if rewards[k] > 0:
+            fruitR[k], fruitC[k] = placeSnakeFruit(occupied[k], length[k], boardSize, fruitSeeds, k)
+        nextStates[k] = encodeSnake(rows[k, headIndex[k]], cols[k, headIndex[k]], direction[k], occupied[k],
+                                    boardSize, fruitR[k], fruitC[k])
+        scores[k] = length[k]
+        states[k] = nextStates[k]
+        # Start the finished games over...
+        if gameOvers[k]:
+            headIndex[k], length[k], direction[k] = resetSnake(rows[k], cols[k], occupied[k])
+            fruitR[k], fruitC[k] = placeSnakeFruit(occupied[k], length[k], boardSize, fruitSeeds, k)
+            states[k] = encodeSnake(rows[k, headIndex[k]], cols[k, headIndex[k]], direction[k], occupied[k],
+                                    boardSize, fruitR[k], fruitC[k])
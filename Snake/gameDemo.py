@@ -35,8 +35,10 @@ while True:
             sys.exit(1)
         state, reward, gameOver = env.stepForward(direction)
         allSnakeStates.append(state)
-        print(boardToString(state))
+        # The top of the loop prints the new board, so
+        # it only needs printing here if the game's over...
         if gameOver:
+            print(boardToString(state))
             print('Game over you died!')
             print('Your score:', agent.score)
             print('Exporting to GIF...')
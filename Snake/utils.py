@@ -12,7 +12,6 @@ the GIFs for when a game is played.
 """
 import imageio
 import numpy as np
-from itertools import product
 import os
 
 
@@ -38,41 +37,63 @@ def produceBoardFrame(snakeGameState: dict, scale=1):
     boardSize = snakeGameState['boardSize']
     frame = snakeGameState['snakeLocs']
     fruitR, fruitC = snakeGameState['fruitLoc']
-    gameFrame = np.zeros(shape=((boardSize + 2) * scale, (boardSize + 2) * scale),
-                         dtype=np.uint8)
+    # Draw the board with one pixel per location first, and
+    # blow it up to the right scale at the end...
+    gameFrame = np.zeros(shape=(boardSize + 2, boardSize + 2), dtype=np.uint8)
     # Put the border...
-    gameFrame[:scale, :] = 50
-    gameFrame[-scale:, :] = 50
-    gameFrame[:, :scale] = 50
-    gameFrame[:, -scale:] = 50
-    # Upscale the frame indices so that each original coordinate
-    # will now represent the upper left corner of a "box".
-    offsetSnakeBody = [((r + 1) * scale, (c + 1) * scale) for r, c in frame[:-1]]
-    # Now add the rest of each box...
-    fullBodyLocs = []
-    for r, c in offsetSnakeBody:
-        fullBodyLocs.extend(product(range(r, r + scale), range(c, c + scale)))
-    # To easily assign values to the gameFrame, a change
-    # of format is necessary...
-    formattedBody = tuple(zip(*[(r, c) for r, c in fullBodyLocs]))
-    # The head and the fruit are different colors, so
-    # format those the same way...
-    formattedFruitLoc = tuple(zip(*[(r, c) for r, c in
-                                    product(range((fruitR + 1) * scale, (fruitR + 2) * scale),
-                                            range((fruitC + 1) * scale, (fruitC + 2) * scale))]))
-    headR, headC = frame[-1]
-    formattedHeadLoc = tuple(zip(*[(r, c) for r, c in
-                                   product(range((headR + 1) * scale, (headR + 2) * scale),
-                                           range((headC + 1) * scale, (headC + 2) * scale))]))
+    gameFrame[0, :] = 50
+    gameFrame[-1, :] = 50
+    gameFrame[:, 0] = 50
+    gameFrame[:, -1] = 50
+    # Turn the locations into one array and offset them by one
+    # for the border, so the whole body can be set in one go...
+    snakeLocs = np.asarray(frame, dtype=np.intp).reshape(-1, 2) + 1
     # The body is white, the head is slightly
     # darker, the fruit is even more darker...
-    gameFrame[formattedBody] = 255
-    gameFrame[formattedHeadLoc] = 220
-    gameFrame[formattedFruitLoc] = 128
+    gameFrame[snakeLocs[:-1, 0], snakeLocs[:-1, 1]] = 255
+    gameFrame[snakeLocs[-1, 0], snakeLocs[-1, 1]] = 220
+    gameFrame[fruitR + 1, fruitC + 1] = 128
+    # Now make each location a scale by scale "box"...
+    gameFrame = gameFrame.repeat(scale, axis=0).repeat(scale, axis=1)
 
     return gameFrame
 
 
+def iterBoardFrames(snakeGameStates, scale=1):
+    """
+    Same as produceBoardFrame(), but for a whole game's worth
+    of states, one frame at a time. Only one board is kept, and
+    each state just erases the snake and fruit from the one before
+    it and draws its own, instead of starting a new board every frame.
+    :param snakeGameStates: A list of state dictionaries, like
+    produceBoardFrame() takes, all on the same size board
+    :param scale: How much to blow up the images.
+    :return: A generator of grayscale-valued ndarrays, a frame for
+    each state. Every frame is a new array, so they can be kept.
+    """
+    boardSize = snakeGameStates[0]['boardSize']
+    gameFrame = np.zeros(shape=(boardSize + 2, boardSize + 2), dtype=np.uint8)
+    # Nothing's been drawn yet, so nothing needs erasing...
+    drawnLocs = np.zeros(shape=(0, 2), dtype=int)
+    for snakeGameState in snakeGameStates:
+        gameFrame[drawnLocs[:, 0], drawnLocs[:, 1]] = 0
+        # Put the border back every time, in case a head
+        # that crashed through the wall got drawn on it...
+        gameFrame[0, :] = 50
+        gameFrame[-1, :] = 50
+        gameFrame[:, 0] = 50
+        gameFrame[:, -1] = 50
+        # Offset by one for the border...
+        snakeLocs = np.asarray(snakeGameState['snakeLocs'], dtype=np.intp).reshape(-1, 2) + 1
+        fruitR, fruitC = snakeGameState['fruitLoc']
+        # Same colors as produceBoardFrame()...
+        gameFrame[snakeLocs[:-1, 0], snakeLocs[:-1, 1]] = 255
+        gameFrame[snakeLocs[-1, 0], snakeLocs[-1, 1]] = 220
+        gameFrame[fruitR + 1, fruitC + 1] = 128
+        drawnLocs = np.vstack((snakeLocs, [(fruitR + 1, fruitC + 1)]))
+        yield gameFrame.repeat(scale, axis=0).repeat(scale, axis=1)
+
+
 def exportGIF(frames, filename, scale=1):
     """
     This method takes in a list of snake frames, either in list of dictionaries form
@@ -91,22 +112,19 @@ def exportGIF(frames, filename, scale=1):
     if isinstance(frames, list):
         # Either it's a list of dictionaries or ndarrays...
         if isinstance(frames[0], dict):
-            with imageio.get_writer(filename, mode='I') as writer:
-                for frame in frames:
-                    gameStep = produceBoardFrame(frame, scale=scale)
-                    writer.append_data(gameStep)
-        else:
-            with imageio.get_writer(filename, mode='I') as writer:
-                for frame in frames:
+            # Draw each frame as it's written, so the
+            # whole game never has to be held in memory...
+            with imageio.get_writer(filename) as writer:
+                for frame in iterBoardFrames(frames, scale=scale):
                     writer.append_data(frame)
+            return
     elif isinstance(frames, str):
         # Read the frames from the npy file...
-        allFrames = np.load(frames)
-        with imageio.get_writer(filename, mode='I') as writer:
-            for frame in allFrames:
-                writer.append_data(frame)
+        frames = np.load(frames)
     else:
         raise ValueError(f'Frames of type {type(frames)} not allowed!')
+    # All the frames are ready, so hand them to imageio in one go...
+    imageio.mimwrite(filename, frames)
 
 
 def boardToString(snakeState: dict):
@@ -120,16 +138,14 @@ def boardToString(snakeState: dict):
     boardSize = snakeState['boardSize']
     snakeLocs = snakeState['snakeLocs']
     fruitLoc = snakeState['fruitLoc']
-    gameStr = np.zeros(shape=(boardSize + 2, boardSize + 2), dtype=str)
-    gameStr[:, :] = '-'
-    # Hashtags for board border...
-    gameStr[0, :] = '#'
-    gameStr[-1, :] = '#'
-    gameStr[:, 0] = '#'
-    gameStr[:, -1] = '#'
+    # One list of characters per row. Hashtags for the board
+    # border, dashes for the empty squares...
+    gameStr = [['#'] * (boardSize + 2)]
+    gameStr += [['#'] + ['-'] * boardSize + ['#'] for _ in range(boardSize)]
+    gameStr.append(['#'] * (boardSize + 2))
     # 's' for snake body, 'h' for haed, 'f' for fruit
-    gameStr[fruitLoc[0] + 1, fruitLoc[1] + 1] = 'f'
+    gameStr[fruitLoc[0] + 1][fruitLoc[1] + 1] = 'f'
     for r, c in snakeLocs[:-1]:
-        gameStr[r + 1, c + 1] = 's'
-    gameStr[snakeLocs[-1][0] + 1, snakeLocs[-1][1] + 1] = 'h'
+        gameStr[r + 1][c + 1] = 's'
+    gameStr[snakeLocs[-1][0] + 1][snakeLocs[-1][1] + 1] = 'h'
     return '\n'.join(''.join(row) for row in gameStr)
@@ -0,0 +1,126 @@
+"""
+File: test_vectorSnakeAgent.py
+Location: /tests/
+Creation Date: 2026-10-15
+
+Tests for VectorSnakeAgent and SnakeQTable.playVectorGames().
+The stacked snakes should play exactly like separate SnakeGames,
+a seed should always give the same games, and games still going
+when playVectorGames() stops should pick up again on the next call.
+Run with python -m unittest discover -s tests -t .
+"""
+import unittest
+import numpy as np
+from Snake.SnakeAgent import SnakeAgent
+from Snake.SnakeEnv import SnakeGame
+from Snake.SnakeQTable import SnakeQTable
+from Snake.VectorSnakeAgent import VectorSnakeAgent
+
+
+class TestVectorSnakeAgent(unittest.TestCase):
+    def testSameSeedSameGames(self):
+        turns = np.random.RandomState(0).randint(0, 3, size=(500, 16))
+        playedGames = []
+        for _ in range(2):
+            vectorAgent = VectorSnakeAgent(numSnakes=16, boardSize=8, seed=5)
+            trajectory = [vectorAgent.states.copy()]
+            for stepTurns in turns:
+                nextStates, rewards, gameOvers = vectorAgent.step(stepTurns)
+                trajectory += [nextStates, rewards, gameOvers, vectorAgent.fruitR.copy(), vectorAgent.fruitC.copy()]
+            playedGames.append(np.concatenate(trajectory))
+        np.testing.assert_array_equal(playedGames[0], playedGames[1])
+
+    def testDifferentSeedsDifferentFruit(self):
+        firstAgent = VectorSnakeAgent(numSnakes=16, boardSize=8, seed=5)
+        secondAgent = VectorSnakeAgent(numSnakes=16, boardSize=8, seed=6)
+        self.assertFalse(np.array_equal(firstAgent.fruitR * 8 + firstAgent.fruitC,
+                                        secondAgent.fruitR * 8 + secondAgent.fruitC))
+
+    def testStepMatchesSnakeGame(self):
+        numSnakes, boardSize = 8, 6
+        vectorAgent = VectorSnakeAgent(numSnakes=numSnakes, boardSize=boardSize, seed=1)
+        rng = np.random.RandomState(1)
+        fruitsEaten = 0
+        gamesOver = 0
+        for _ in range(2000):
+            # Put a SnakeGame in exactly the same spot as each snake...
+            envs = []
+            for k in range(numSnakes):
+                env = SnakeGame(SnakeAgent(boardSize=boardSize), boardSize=boardSize)
+                agent = env.agent
+                agent.rows[:] = vectorAgent.rows[k]
+                agent.cols[:] = vectorAgent.cols[k]
+                agent.occupied[:] = vectorAgent.occupied[k]
+                agent.headIndex = int(vectorAgent.headIndex[k])
+                agent.score = int(vectorAgent.length[k])
+                agent.directionIndex = int(vectorAgent.directionIndex[k])
+                env.fruitR, env.fruitC = int(vectorAgent.fruitR[k]), int(vectorAgent.fruitC[k])
+                env.encodedState = None
+                self.assertEqual(env.encodeCurrentState(), vectorAgent.states[k])
+                envs.append(env)
+            turns = rng.randint(0, 3, numSnakes)
+            nextStates, rewards, gameOvers = vectorAgent.step(turns)
+            for k, env in enumerate(envs):
+                coding, reward, gameOver = env.step(int(turns[k]))
+                self.assertEqual(reward, rewards[k])
+                self.assertEqual(gameOver, gameOvers[k])
+                self.assertEqual(env.agent.score, vectorAgent.scores[k])
+                if reward > 0 and not gameOver:
+                    # Both placed a new fruit, but from different random numbers,
+                    # so put the SnakeGame's fruit where the snake's went...
+                    fruitsEaten += 1
+                    env.fruitR, env.fruitC = int(vectorAgent.fruitR[k]), int(vectorAgent.fruitC[k])
+                    env.encodedState = None
+                    coding = env.encodeCurrentState()
+                if gameOver:
+                    gamesOver += 1
+                else:
+                    np.testing.assert_array_equal(env.agent.occupied, vectorAgent.occupied[k])
+                self.assertEqual(coding, nextStates[k])
+        # Make sure both kinds of move actually got checked...
+        self.assertGreater(fruitsEaten, 0)
+        self.assertGreater(gamesOver, 0)
+
+
+class TestPlayVectorGames(unittest.TestCase):
+    def testUnfinishedGamesCarryOver(self):
+        np.random.seed(2)
+        qtableObj = SnakeQTable(boardSize=10)
+        qtableObj.epsilon = 1
+        qtableObj.playVectorGames(1, 8)
+        # Write down how far along every game still going is...
+        carriedGames = {}
+        for snake, moves in enumerate(qtableObj.vectorMoves.tolist()):
+            if moves > 0:
+                carriedGames[snake] = (qtableObj.vectorStates[snake, :moves + 1].copy(),
+                                       qtableObj.vectorActions[snake, :moves].copy())
+        self.assertGreater(len(carriedGames), 0)
+        gameMemories = qtableObj.playVectorGames(500, 8)
+        # Each of those games should come out whole, starting from where it was...
+        for states, actions in carriedGames.values():
+            moves = len(actions)
+            self.assertTrue(any(len(memory[1]) > moves and np.array_equal(memory[0][:moves + 1], states)
+                                and np.array_equal(memory[1][:moves], actions) for memory in gameMemories))
+
+    def testGamesGetCutOffAtMaxSteps(self):
+        qtableObj = SnakeQTable(boardSize=10)
+        qtableObj.maxSteps = 25
+        # Always turning right goes around a 2 by 2 square forever,
+        # so no game ever ends by itself...
+        qtableObj.epsilon = 0
+        qtableObj.Qtable[:] = 0
+        qtableObj.Qtable[:, SnakeAgent.ACTION_INDICES['R']] = 1
+        for _ in range(3):
+            gameMemories = qtableObj.playVectorGames(4, 4)
+            self.assertEqual(len(gameMemories), 4)
+            for states, actions, rewards, nextStates, gameOvers in gameMemories:
+                self.assertEqual(len(actions), qtableObj.maxSteps)
+                self.assertFalse(gameOvers.any())
+                np.testing.assert_array_equal(states[1:], nextStates[:-1])
+            # ...and every snake started a fresh game afterwards.
+            np.testing.assert_array_equal(qtableObj.vectorMoves, 0)
+            np.testing.assert_array_equal(qtableObj.vectorAgent.length, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()